@@ -12,14 +12,35 @@ DATABASE_URI = os.getenv(
 )
 
 # override if we are running in Cloud Foundry
-if 'VCAP_SERVICES' in os.environ:
-    vcap = json.loads(os.environ['VCAP_SERVICES'])
+# (lowercase so from_object does not copy the credentials into app.config)
+vcap_services = os.getenv("VCAP_SERVICES")
+if vcap_services:
+    vcap = json.loads(vcap_services)
     DATABASE_URI = vcap['user-provided'][0]['credentials']['url']
 
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# Size the connection pool for concurrent gunicorn workers
+# (SQLite does not use a QueuePool so it keeps the defaults)
+SQLALCHEMY_ENGINE_OPTIONS = {}
+if not DATABASE_URI.startswith("sqlite"):
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 20)),
+        "pool_timeout": 30,
+        "pool_recycle": 1800,  # recycle before the server reaps idle connections
+        "pool_pre_ping": True,
+    }
+
+# Leave keys in insertion order wherever Flask's own JSON encoder is used
+JSON_SORT_KEYS = False
+
+# Short-lived in-process cache for single Product reads
+CACHE_TYPE = os.getenv("CACHE_TYPE", "SimpleCache")
+CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 60))
+
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "sup3r-s3cr3t")
 LOGGING_LEVEL = logging.INFO
@@ -7,12 +7,16 @@ and SQL database
 import sys
 import logging
 from flask import Flask
+from flask_caching import Cache
 
 # Create Flask application
 app = Flask(__name__)
 app.url_map.strict_slashes = False
 app.config.from_object("config")
 
+# Cache for read-heavy endpoints, configured from CACHE_* settings
+cache = Cache(app)
+
 # Import the routes After the Flask app is created
 from service import routes, models
 # from .utils import error_handlers
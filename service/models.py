@@ -17,13 +17,19 @@ stock (integer) - Remaining stock of the product
 description (string) - A brief description which is used to describe a product
 
 """
+import os
 import logging
-from flask import Flask
+from operator import itemgetter
+from flask import Flask, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import CheckConstraint
+from sqlalchemy.pool import StaticPool
 
 logger = logging.getLogger("flask.app")
 
+# Set SKIP_CREATE_ALL when the schema is managed outside of the workers
+SKIP_CREATE_ALL = os.getenv("SKIP_CREATE_ALL", "").lower() in ("1", "true", "yes")
+
 # Create the SQLAlchemy object to be initialized later in init_db()
 db = SQLAlchemy()
 
@@ -53,8 +59,8 @@ class Product(db.Model):
     # Table Schema
     ##################################################
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(63), nullable=False)
-    category = db.Column(db.String(63), nullable=False)
+    name = db.Column(db.String(63), nullable=False, index=True)
+    category = db.Column(db.String(63), nullable=False, index=True)
     price = db.Column(db.Integer, nullable=False, default=100)
     stock = db.Column(db.Integer, nullable=False)
     description = db.Column(db.String(128))
@@ -63,6 +69,12 @@ class Product(db.Model):
     # )
     # we should consider about the negative price in next sprint
 
+    # string fields that must be present when deserializing
+    _REQUIRED_FIELDS = ("name", "category", "description")
+    _get_required = itemgetter(*_REQUIRED_FIELDS)
+    # integer fields, which may also arrive as digit strings
+    _INT_FIELDS = ("stock", "price")
+
     ##################################################
     # INSTANCE METHODS
     ##################################################
@@ -116,31 +128,20 @@ class Product(db.Model):
         Args:
             data (dict): A dictionary containing the Product data
         """
-        print(data)
         try:
-            self.name = data["name"]
-            self.category = data["category"]
-            self.description = data["description"]
+            self.name, self.category, self.description = self._get_required(data)
             
-            # Check the validity of the stock attribute
-            stock = data.get("stock", "")
-            if isinstance(stock, int) or (stock and stock.isdigit()):
-                self.stock = int(stock)
-            else:
-                raise DataValidationError(
-                    "Invalid type for integer [stock]: "
-                    + str(type(data["stock"]))
-                )
-
-            # Check the validity of the price attribute
-            price = data.get("price", "")
-            if isinstance(price, int) or (price and price.isdigit()):
-                self.price = int(price)
-            else:
-                raise DataValidationError(
-                    "Invalid type for integer [price]: "
-                    + str(type(data["price"]))
-                )
+            # Check the validity of the integer attributes
+            for field in self._INT_FIELDS:
+                value = data.get(field, "")
+                # type() is an exact pointer compare, and rejects bools too
+                if type(value) is int or (type(value) is str and value.isdecimal()):
+                    setattr(self, field, int(value))
+                else:
+                    raise DataValidationError(
+                        "Invalid type for integer [" + field + "]: "
+                        + str(type(data[field]))
+                    )
         #except AttributeError as error:
         #    raise DataValidationError("Invalid attribute: " + error.args[0])
         except KeyError as error:
@@ -166,10 +167,46 @@ class Product(db.Model):
 
         """
         logger.info("Initializing database")
-        # Initialize SQLAlchemy from the Flask app
-        db.init_app(app)
-        app.app_context().push()
-        db.create_all()  # make sqlalchemy tables
+        if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+            # SQLite has no server pool to size, and an in-memory
+            # database only lives as long as its single connection
+            engine_options = {}
+            if app.config["SQLALCHEMY_DATABASE_URI"] == "sqlite:///:memory:":
+                engine_options = {
+                    "poolclass": StaticPool,
+                    "connect_args": {"check_same_thread": False},
+                }
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+        # Initialize SQLAlchemy from the Flask app once; a second init_app
+        # would build a new engine, and with it a new empty in-memory
+        # database, while existing sessions stay bound to the old one
+        if "sqlalchemy" not in app.extensions:
+            db.init_app(app)
+        # only push a context once instead of stacking one per call
+        if not has_app_context():
+            app.app_context().push()
+        if not SKIP_CREATE_ALL:
+            db.create_all()  # make sqlalchemy tables
+
+    @classmethod
+    def bulk_create(cls, items: list):
+        """Creates many Products in the database with a single commit
+
+        :param items: dictionaries of Product column values
+        :type items: list
+
+        """
+        logger.info("Creating %s Products", len(items))
+        db.session.bulk_insert_mappings(cls, items)
+        db.session.commit()
+
+    @classmethod
+    def remove_all(cls):
+        """Removes all of the Products from the database"""
+        logger.info("Removing all Products")
+        # one bulk DELETE instead of loading and deleting each row
+        cls.query.delete()
+        db.session.commit()
 
     @classmethod
     def all(cls) -> list:
@@ -177,6 +214,21 @@ class Product(db.Model):
         logger.info("Processing all Products")
         return cls.query.all()
 
+    @classmethod
+    def stream_all(cls, batch_size: int = 100):
+        """Returns all of the Products in the database as an iterator
+
+        The query runs before this returns, so database errors are raised
+        here rather than part way through the iteration.
+
+        :param batch_size: the number of rows fetched from the cursor per batch
+        :type batch_size: int
+
+        """
+        logger.info("Streaming all Products")
+        stmt = db.select(cls).execution_options(yield_per=batch_size)
+        return db.session.execute(stmt).scalars()
+
     @classmethod
     def find(cls, product_id: int):
         """Finds a Product by it's ID
@@ -188,9 +240,24 @@ class Product(db.Model):
         :type: Product
 
         """
-        logger.info("Processing lookup for id %s ...", product_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processing lookup for id %s ...", product_id)
         return cls.query.get(product_id)
 
+    @classmethod
+    def bulk_find(cls, product_ids: list) -> list:
+        """Finds many Products by their IDs with a single query
+
+        :param product_ids: the ids of the Products to find
+        :type product_ids: list
+
+        :return: the Products that were found, missing ids are skipped
+        :type: list
+
+        """
+        logger.info("Processing lookup for %s ids ...", len(product_ids))
+        return cls.query.filter(cls.id.in_(product_ids)).all()
+
     @classmethod
     def find_or_404(cls, product_id: int):
         """Find a Product by it's id
@@ -202,7 +269,8 @@ class Product(db.Model):
         :type: Product
 
         """
-        logger.info("Processing lookup or 404 for id %s ...", product_id)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Processing lookup or 404 for id %s ...", product_id)
         return cls.query.get_or_404(product_id)
 
     @classmethod
@@ -217,7 +285,7 @@ class Product(db.Model):
 
         """
         logger.info("Processing name query for %s ...", name)
-        return cls.query.filter(cls.name == name)
+        return db.session.scalars(_FIND_BY_NAME_STMT, {"name": name}).all()
 
     @classmethod
     def find_by_category(cls, category: str) -> list:
@@ -231,4 +299,11 @@ class Product(db.Model):
 
         """
         logger.info("Processing name query for %s ...", category)
-        return cls.query.filter(cls.category == category)
+        return db.session.scalars(_FIND_BY_CATEGORY_STMT, {"category": category}).all()
+
+
+# Build the finder lookups once so SQLAlchemy can reuse their compiled form
+_FIND_BY_NAME_STMT = db.select(Product).where(Product.name == db.bindparam("name"))
+_FIND_BY_CATEGORY_STMT = db.select(Product).where(
+    Product.category == db.bindparam("category")
+)
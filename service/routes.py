@@ -14,20 +14,29 @@ DELETE /products/{id} - deletes a Product record in the database
 import sys
 import secrets
 import logging
+from decimal import Decimal
 from functools import wraps
-from flask import jsonify, request, url_for, make_response, render_template
+import orjson
+from flask import request, url_for, render_template, stream_with_context
 from flask_restx import Api, Resource, fields, reqparse, inputs
-from service.models import Product, DataValidationError, DatabaseConnectionError
+from service.models import Product, DataValidationError, DatabaseConnectionError, db
 from .utils import status   # HTTP Status Codes
-from . import app  
+from . import app, cache
 
 ######################################################################
 # GET HEALTH CHECK
 ######################################################################
+# the probe body never changes, so encode it once
+HEALTH_BODY = orjson.dumps(
+    {"status": 200, "message": "Healthy"}, option=orjson.OPT_APPEND_NEWLINE
+)
+
 @app.route("/healthcheck")
 def healthcheck():
     """Let them know our heart is still beating"""
-    return make_response(jsonify(status=200, message="Healthy"), status.HTTP_200_OK)
+    return app.response_class(
+        HEALTH_BODY, status=status.HTTP_200_OK, mimetype="application/json"
+    )
 
 ######################################################################
 # Configure the Root route before OpenAPI
@@ -53,6 +62,28 @@ api = Api(app,
          )
 
 
+def json_default(obj):
+    """Encodes the types orjson does not handle natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError("Type is not JSON serializable: {}".format(type(obj).__name__))
+
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    """Makes a JSON response using orjson instead of the stdlib encoder"""
+    option = orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+    if app.debug:
+        option |= orjson.OPT_INDENT_2
+    resp = app.response_class(
+        orjson.dumps(data, default=json_default, option=option),
+        status=code,
+        mimetype="application/json",
+    )
+    resp.headers.extend(headers or {})
+    return resp
+
+
 # Define the model so that the docs reflect what can be sent
 create_model = api.model('Product', {
     'name': fields.String(required=True,
@@ -111,7 +142,7 @@ def database_connection_error(error):
 ######################################################################
 #  PATH: /products/{id}
 ######################################################################
-@api.route('/products/<product_id>')
+@api.route('/products/<int:product_id>')
 @api.param('product_id', 'The Product identifier')
 class ProductResource(Resource):
     """
@@ -129,6 +160,7 @@ class ProductResource(Resource):
     @api.doc('get_products')
     @api.response(404, 'Product not found')
     @api.marshal_with(product_model)
+    @cache.cached(make_cache_key=lambda resource, product_id: product_cache_key(product_id))
     def get(self, product_id):
         """
         Retrieve a single Product
@@ -164,6 +196,7 @@ class ProductResource(Resource):
         product.deserialize(data)
         product.id = product_id
         product.update()
+        cache.delete(product_cache_key(product_id))
         return product.serialize(), status.HTTP_200_OK
 
     #------------------------------------------------------------------
@@ -182,6 +215,7 @@ class ProductResource(Resource):
         product = Product.find(product_id)
         if product:
             product.delete()
+            cache.delete(product_cache_key(product_id))
             app.logger.info('Product with id [%s] was deleted', product_id)
         else:
             abort(status.HTTP_404_NOT_FOUND, "Product with id '{}' was not found.".format(product_id))
@@ -200,29 +234,28 @@ class ProductCollection(Resource):
     #------------------------------------------------------------------
     @api.doc('list_products')
     @api.expect(product_args, validate=True)
-    @api.response(200, 'Listed all products')
-    @api.marshal_list_with(product_model)
+    @api.response(200, 'Listed all products', [product_model])
     def get(self):
         """ List Products """
-        app.logger.info('Request to list Products...')
-        products = []
+        log_info = app.logger.isEnabledFor(logging.INFO)
+        if log_info:
+            app.logger.info('Request to list Products...')
         args = product_args.parse_args()
-        if args.get('id'):
-            app.logger.error('Filtering by id: %s', args['id'])
-            products = [Product.find(int(args['id']))]
-        elif args.get('name'):
-            app.logger.info('Filtering by name: %s', args['name'])
-            products = Product.find_by_name(args['name'])
-        elif args.get('category'):
-            app.logger.info('Filtering by category: %s', args['category'])
-            products = Product.find_by_category(args['category'])
-        else:
+        # use the first filter that was supplied, in priority order; only a
+        # missing or empty argument is skipped, so ?id=0 still filters
+        for key, finder in LIST_FILTERS:
+            value = args.get(key)
+            if value is not None and value != "":
+                if log_info:
+                    app.logger.info('Filtering by %s: %s', key, value)
+                return stream_json_list(finder(value))
+
+        if log_info:
             app.logger.info('Returning unfiltered list.')
-            products = Product.all()
-
-        results = [product.serialize() for product in products]
-        app.logger.info('[%s] Products returned', len(results))
-        return results, status.HTTP_200_OK
+        # stream_all runs the query now, before the 200 is sent, so a
+        # database error still reaches the error handlers
+        products = Product.stream_all()
+        return stream_json_list(product.serialize() for product in products)
 
 
     #------------------------------------------------------------------
@@ -243,6 +276,8 @@ class ProductCollection(Resource):
         app.logger.debug('Payload = %s', api.payload)
         product.deserialize(api.payload) # difference
         product.create()
+        # the id may be reused after a reset, so drop anything cached for it
+        cache.delete(product_cache_key(product.id))
         app.logger.info('Product with new id [%s] created!', product.id)
         location_url = api.url_for(ProductResource, product_id=product.id, _external=True)
         return product.serialize(), status.HTTP_201_CREATED, {'Location': location_url}
@@ -271,7 +306,7 @@ class ProductCollection(Resource):
 ######################################################################
 #  PATH: /products/{id}/purchase
 ######################################################################
-@api.route('/products/<product_id>/purchase')
+@api.route('/products/<int:product_id>/purchase')
 @api.param('product_id', 'The Product identifier')
 class PurchaseResource(Resource):
     """ Purchase actions on a Product """
@@ -294,6 +329,7 @@ class PurchaseResource(Resource):
         stock_num = product.stock
         product.stock = stock_num - 1
         product.update()
+        cache.delete(product_cache_key(product_id))
         app.logger.info('Product with id [%s] has been purchased!', product.id)
         return product.serialize(), status.HTTP_200_OK
 
@@ -302,6 +338,56 @@ class PurchaseResource(Resource):
 #  U T I L I T Y   F U N C T I O N S
 ######################################################################
 
+def stream_json_list(items):
+    """Streams an iterable of dictionaries as a JSON array"""
+    def generate():
+        count = 0
+        yield b"["
+        for item in items:
+            if count:
+                yield b","
+            yield orjson.dumps(item, default=json_default)
+            count += 1
+        yield b"]\n"
+        if app.logger.isEnabledFor(logging.INFO):
+            app.logger.info('[%s] Products returned', count)
+
+    return app.response_class(
+        stream_with_context(generate()),
+        status=status.HTTP_200_OK,
+        mimetype="application/json",
+    )
+
+def list_by_id(product_id):
+    """Returns the serialized Product with the id, if there is one"""
+    product = Product.find(int(product_id))
+    return [product.serialize()] if product else []
+
+# select the columns directly and skip ORM hydration, built once
+_LIST_BY_NAME_STMT = db.select(*Product.__table__.columns).where(
+    Product.name == db.bindparam("name")
+)
+
+def list_by_name(name):
+    """Returns the serialized Products with the name"""
+    result = db.session.execute(_LIST_BY_NAME_STMT, {"name": name})
+    return (dict(row) for row in result.mappings())
+
+def list_by_category(category):
+    """Returns the serialized Products in the category"""
+    return (product.serialize() for product in Product.find_by_category(category))
+
+# query argument -> finder used by list_products, in priority order
+LIST_FILTERS = (
+    ("id", list_by_id),
+    ("name", list_by_name),
+    ("category", list_by_category),
+)
+
+def product_cache_key(product_id):
+    """Returns the cache key of a single Product response"""
+    return "product/{}".format(product_id)
+
 def abort(error_code: int, message: str):
     """Logs errors before aborting"""
     app.logger.error(message)
@@ -316,7 +402,7 @@ def init_db():
 def check_content_type(media_type):
     """Checks that the media type is correct"""
     content_type = request.headers.get("Content-Type")
-    if content_type and content_type == media_type:
+    if content_type == media_type:
         return
     app.logger.error("Invalid Content-Type: %s", content_type)
     abort(
@@ -11,3 +11,52 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+"""
+Test package for the Product service
+
+The service opens its database when it is first imported, so the test
+database is chosen here, before any test module imports it.
+"""
+import os
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+
+def worker_database_uri(uri: str, worker: str) -> str:
+    """Returns the URI of a database of the worker's own, creating it if needed
+
+    :param uri: the URI of the shared test database
+    :type uri: str
+    :param worker: the pytest-xdist worker id, e.g. gw0
+    :type worker: str
+
+    """
+    url = make_url(uri)
+    if url.database in (None, "", ":memory:"):
+        return uri  # every worker process already has its own database
+    worker_url = url.set(database="{}_{}".format(url.database, worker))
+    if url.get_backend_name() == "postgresql":
+        # CREATE DATABASE cannot run inside a transaction
+        engine = create_engine(url, isolation_level="AUTOCOMMIT")
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM pg_database WHERE datname = :name"),
+                {"name": worker_url.database},
+            ).scalar()
+            if not exists:
+                name = engine.dialect.identifier_preparer.quote(worker_url.database)
+                conn.exec_driver_sql("CREATE DATABASE " + name)
+        engine.dispose()
+    # a SQLite file is created on first connect
+    return worker_url.render_as_string(hide_password=False)
+
+
+# Use an in-memory SQLite database unless DATABASE_URI points elsewhere (CI)
+os.environ.setdefault("DATABASE_URI", "sqlite:///:memory:")
+
+# under pytest-xdist give each worker its own database (e.g. testdb_gw0)
+if os.getenv("PYTEST_XDIST_WORKER"):
+    os.environ["DATABASE_URI"] = worker_database_uri(
+        os.environ["DATABASE_URI"], os.environ["PYTEST_XDIST_WORKER"]
+    )
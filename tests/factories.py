@@ -1,9 +1,21 @@
 """
 Product Factory class for making fake objects
 """
+import random
 import factory
-from factory.fuzzy import FuzzyChoice
-from service.models import Product
+from faker import Faker
+from service.models import Product, db
+
+# One seeded generator and one Faker for every product, so runs are repeatable
+SEED = 2022
+RNG = random.Random(SEED)
+FAKER = Faker()
+FAKER.seed_instance(SEED)
+
+NAMES = ("iPhone13", "iPad", "Macbook Air", "Macbook Pro")
+CATEGORIES = ("Phone", "Laptop", "Earphone", "Keyboard", "Mouse")
+PRICES = (50, 100, 200, 1000)
+STOCKS = (0, 1, 2, 3)
 
 
 class ProductFactory(factory.Factory):
@@ -13,8 +25,18 @@ class ProductFactory(factory.Factory):
         model = Product
 
     id = factory.Sequence(lambda n: n)
-    name = FuzzyChoice(choices=["iPhone13", "iPad", "Macbook Air", "Macbook Pro"])
-    category = FuzzyChoice(choices=["Phone", "Laptop", "Earphone", "Keyboard", "Mouse"])
-    description = factory.Faker("word")
-    price = FuzzyChoice(choices=[50, 100, 200, 1000])
-    stock = FuzzyChoice(choices=[0, 1, 2, 3])
+    name = factory.LazyFunction(lambda: RNG.choice(NAMES))
+    category = factory.LazyFunction(lambda: RNG.choice(CATEGORIES))
+    description = factory.LazyFunction(FAKER.word)
+    price = factory.LazyFunction(lambda: RNG.choice(PRICES))
+    stock = factory.LazyFunction(lambda: RNG.choice(STOCKS))
+
+
+def bulk_create_products(count, **fields):
+    """Saves count fake products in one batch and returns them with their new ids"""
+    products = ProductFactory.build_batch(count, **fields)
+    for product in products:
+        product.id = None  # let the database assign the ids
+    db.session.bulk_save_objects(products, return_defaults=True)
+    db.session.commit()
+    return products